@@ -0,0 +1,66 @@
+"""Per-event logging overhead: old print() path vs eventlog.
+
+The old path is what handle_client/send() did for every event: print() to
+an unbuffered pipe (PYTHONUNBUFFERED=1 with stdout going to journald). The
+pipe is drained by a thread standing in for journald.
+
+Usage: python3 bench_eventlog.py [events]
+"""
+import io
+import os
+import sys
+import threading
+import time
+
+import eventlog
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+MESSAGE = "MOUSE:MOVE:12:-7"
+
+def unbuffered_pipe():
+    """A write-through text stream whose other end is drained in the background"""
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        while os.read(read_fd, 65536):
+            pass
+
+    threading.Thread(target=drain, daemon=True).start()
+    return io.TextIOWrapper(io.FileIO(write_fd, 'w'), write_through=True)
+
+def bench(name, fn):
+    start = time.perf_counter()
+    for _ in range(EVENTS):
+        fn(MESSAGE)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<36} {elapsed / EVENTS * 1e6:8.2f} us/event", file=sys.__stdout__)
+
+journal = unbuffered_pipe()
+
+def old_print(text):
+    print(f"[RECV] {text}", file=journal)
+
+eventlog.setup({"recv": "WARNING"}, stream=journal)
+recv_log = eventlog.get("recv")
+
+def new_default(text):
+    eventlog.record_event("recv", text)
+    recv_log.debug("RECV %s", text)
+
+def new_enabled(text):
+    eventlog.record_event("recv", text)
+    recv_log.warning("RECV %s", text)
+
+counter = iter(range(EVENTS))
+
+def new_enabled_distinct(text):
+    # Unique messages defeat rate limiting, so every record is queued
+    eventlog.record_event("recv", text)
+    recv_log.warning("RECV %d %s", next(counter), text)
+
+print(f"{EVENTS} events", file=sys.__stdout__)
+bench("before: print() to unbuffered pipe", old_print)
+bench("after: default (ring only)", new_default)
+bench("after: enabled, repeats rate-limited", new_enabled)
+bench("after: enabled, every record queued", new_enabled_distinct)
+eventlog.shutdown()
@@ -1,89 +1,281 @@
 import tkinter as tk
 from tkinter import Menu
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageChops
 import requests
 from io import BytesIO
 import socket
 import threading
 import time
+import sys
+import eventlog
+import inputmap
+import random
+from collections import deque
 
 # ---------------- CONFIGURATION ----------------
-PI_IP = "192.168.137.242"
+PI_IP = sys.argv[1] if len(sys.argv) > 1 else "192.168.137.242"
 EVENT_PORT = 5000
 STREAM_URL = f"http://{PI_IP}:8080/?action=stream"
 
-# Mouse keyboard control settings
-MOUSE_SPEED_SLOW = 5      # pixels per key press
-MOUSE_SPEED_FAST = 15     # pixels when holding Shift
+# Local cursor overlay, drawn at the predicted target cursor position until frames catch up
+CURSOR_OVERLAY = True
+CURSOR_PIPELINE_DELAY = 0.15   # seconds of capture/encode/decode latency on top of RTT and frame interval
+CURSOR_DIFF_THRESHOLD = 40     # grey-level change between frames that counts as movement
+CURSOR_MAX_SIZE = 48           # stream pixels; larger changed regions are screen content, not the cursor
+CURSOR_SNAP_RADIUS = 96        # stream pixels; once locked, ignore changes farther than this from the estimate
+CURSOR_GRID = 8                # cell size used to group changed pixels into regions
+
+# Region-of-interest zoom
+ZOOM_MIN_DRAG = 8   # Drags smaller than this (canvas pixels) cancel the selection
 
 # Resolution tracking
 target_resolution = (1920, 1080)  # Default, will be updated
 stream_resolution = (1280, 720)   # Default, will be detected
 resolution_detected = False
 current_quality = "720p"  # Default quality preset
+zoom_region = None        # (x, y, w, h) in target pixels while zoomed, set by the Pi
 
 # Stream control
 stream_active = True
 stream_reconnect_flag = False
 
-# ---------------- TCP SENDER ----------------
-sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-try:
-    sock.connect((PI_IP, EVENT_PORT))
-    print("[DEBUG] Connected to Pi event server")
-except Exception as e:
-    print("[ERROR] Could not connect to Pi:", e)
-    exit(1)
+# Event connection settings
+CONNECT_TIMEOUT = 2
+HEARTBEAT_INTERVAL = 0.25     # seconds between PINGs
+HEARTBEAT_TIMEOUT = 1.0       # link is considered dead after this long without data
+RECONNECT_BACKOFF_MIN = 0.2
+RECONNECT_BACKOFF_MAX = 5.0
+RECONFIGURE_GRACE = 8.0       # Pi stops answering while it restarts mjpg_streamer
+DISCONNECTED_INPUT_POLICY = "buffer_keys"  # "drop", "buffer_keys" (drop mouse moves) or "buffer_all"
+MAX_BUFFERED_COMMANDS = 100
+
+# ---------------- LOGGING ----------------
+# Per-category levels; override at runtime with REMOTEPI_LOG="send=DEBUG,recv=DEBUG"
+LOG_LEVELS = {
+    "send": "WARNING",   # every key press and mouse movement
+    "recv": "WARNING",   # every message from the Pi
+}
+eventlog.setup(LOG_LEVELS)
+log = eventlog.get("client")
+send_log = eventlog.get("send")
+recv_log = eventlog.get("recv")
+
+# ---------------- EVENT CONNECTION ----------------
+sock = None                   # Live event socket, None while disconnected
+sock_lock = threading.Lock()
+session_established = False   # True once we have talked to the Pi at least once
+resync_pending = False        # Compare Pi state against ours on the next greeting
+reconfigure_deadline = 0      # Pi blocks while restarting mjpg_streamer, don't time out before this
+disconnected_buffer = deque(maxlen=MAX_BUFFERED_COMMANDS)
+modifiers_at_disconnect = set()
+last_ping_sent = 0
+rtt_estimate = 0.05           # Smoothed PING/PONG round trip, seconds
+
+MODIFIER_COMMANDS = {f"{prefix}:{name}" for prefix in ("KEY", "KEYUP")
+                     for name in inputmap.MODIFIERS}
+
+def buffer_while_disconnected(cmd):
+    """Apply DISCONNECTED_INPUT_POLICY to a command that could not be sent"""
+    global resync_pending
+    if cmd.startswith("SET_"):
+        # Not replayed: the Pi would block mid-greeting and the resync would
+        # apply it a second time. The resync sends our settings instead.
+        resync_pending = True
+        return
+    if DISCONNECTED_INPUT_POLICY == "drop" or cmd == "PING":
+        return
+    # Modifier state is resynced from keys.pressed_modifiers on reconnect
+    if cmd in MODIFIER_COMMANDS:
+        return
+    # Relative moves are stale by the time the link is back
+    if DISCONNECTED_INPUT_POLICY == "buffer_keys" and cmd.startswith("MOUSE:MOVE:"):
+        return
+    disconnected_buffer.append(cmd)
+
+def send_raw(s, cmd):
+    global last_ping_sent
+    s.sendall((cmd + "\n").encode())
+    if cmd == "PING":
+        last_ping_sent = time.monotonic()
+    else:
+        eventlog.record_event("send", cmd)
+        send_log.debug("SEND %s", cmd)
 
 def send(cmd):
+    global reconfigure_deadline
+    with sock_lock:
+        if sock is not None:
+            try:
+                if cmd.startswith("SET_"):
+                    reconfigure_deadline = time.monotonic() + RECONFIGURE_GRACE
+                send_raw(sock, cmd)
+                return
+            except OSError as e:
+                log.error("Failed to send: %s", e)
+                drop_connection_locked()
+        buffer_while_disconnected(cmd)
+
+def drop_connection_locked():
+    """Close the event socket; caller must hold sock_lock"""
+    global sock
+    if sock is None:
+        return
+    modifiers_at_disconnect.clear()
+    modifiers_at_disconnect.update(keys.pressed_modifiers)
     try:
-        sock.send((cmd + "\n").encode())
-        print(f"[SEND] {cmd}")
-    except Exception as e:
-        print("[ERROR] Failed to send:", e)
-
-# ---------------- RESOLUTION LISTENER ----------------
-def listen_for_resolution():
-    """Listen for resolution info from Pi Zero"""
-    global target_resolution, stream_resolution, resolution_detected, stream_reconnect_flag
-    try:
-        while True:
-            data = sock.recv(1024)
-            if not data:
-                break
-            
-            message = data.decode().strip()
-            print(f"[RECV] {message}")
-            
-            if message.startswith("RESOLUTION:"):
-                parts = message.split(':')
-                if len(parts) >= 3:
-                    width = int(parts[1])
-                    height = int(parts[2])
-                    target_resolution = (width, height)
-                    print(f"[INFO] Target PC resolution set to: {width}x{height}")
-                    update_resolution_display()
-            elif message.startswith("STREAM_RESOLUTION:"):
-                parts = message.split(':')
-                if len(parts) >= 3:
-                    width = int(parts[1])
-                    height = int(parts[2])
-                    old_resolution = stream_resolution
-                    stream_resolution = (width, height)
-                    resolution_detected = True
-                    print(f"[INFO] Stream resolution changed to: {width}x{height}")
-                    
-                    # Trigger stream reconnection if resolution actually changed
-                    if old_resolution != stream_resolution:
-                        print("[INFO] Triggering stream reconnection...")
-                        stream_reconnect_flag = True
-                    
-                    update_resolution_display()
-    except Exception as e:
-        print(f"[ERROR] Resolution listener error: {e}")
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+    sock = None
+    log.warning("Lost connection to Pi event server")
+    root.after(0, update_resolution_display)
+
+def on_connected(s):
+    """Install a fresh socket and replay client-side input state"""
+    global sock, session_established, resync_pending
+    with sock_lock:
+        sock = s
+        if session_established:
+            resync_pending = True
+        session_established = True
+        # Release modifiers let go while offline, re-press the ones still held
+        for key in modifiers_at_disconnect - keys.pressed_modifiers:
+            send_raw(s, f"KEYUP:{inputmap.KEY_MAP[key]}")
+        for key in keys.pressed_modifiers:
+            send_raw(s, f"KEY:{inputmap.KEY_MAP[key]}")
+        # Input typed before this connection, including before the first one
+        while disconnected_buffer:
+            send_raw(s, disconnected_buffer[0])
+            disconnected_buffer.popleft()
+    log.info("Connected to Pi event server")
+    root.after(0, update_resolution_display)
+
+def event_connection_loop():
+    """Connect to the Pi, run the listener, and reconnect with jittered backoff"""
+    backoff = RECONNECT_BACKOFF_MIN
+    while stream_active:
+        try:
+            s = socket.create_connection((PI_IP, EVENT_PORT), timeout=CONNECT_TIMEOUT)
+        except OSError as e:
+            delay = random.uniform(RECONNECT_BACKOFF_MIN, backoff)
+            log.warning("Could not connect to Pi (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+            continue
+
+        backoff = RECONNECT_BACKOFF_MIN
+        try:
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            s.settimeout(HEARTBEAT_INTERVAL)
+            on_connected(s)
+            listen_for_messages(s)
+        except Exception as e:
+            # Never let one bad connection end the reconnect loop
+            log.warning("Event connection failed: %s", e)
+            time.sleep(random.uniform(0, RECONNECT_BACKOFF_MIN))
+        finally:
+            with sock_lock:
+                if sock is s:
+                    drop_connection_locked()
+                else:
+                    s.close()
+
+# ---------------- MESSAGE LISTENER ----------------
+def listen_for_messages(s):
+    """Read messages from the Pi and send heartbeats until the link dies"""
+    last_recv = time.monotonic()
+    last_ping = 0
+    buffer = ""
+    while stream_active:
+        now = time.monotonic()
+        if now - last_ping >= HEARTBEAT_INTERVAL:
+            send("PING")
+            last_ping = now
+        if now - last_recv > HEARTBEAT_TIMEOUT and now > reconfigure_deadline:
+            log.warning("No heartbeat from Pi for %.1fs", now - last_recv)
+            return
+
+        try:
+            data = s.recv(1024)
+        except socket.timeout:
+            continue
+        except OSError as e:
+            log.warning("Event connection error: %s", e)
+            return
+        if not data:
+            return
 
-# Start resolution listener thread
-threading.Thread(target=listen_for_resolution, daemon=True).start()
+        last_recv = time.monotonic()
+        buffer += data.decode()
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            message = line.strip()
+            if message == "PONG":
+                update_rtt_estimate()
+            elif message:
+                handle_message(message)
+
+def update_rtt_estimate():
+    """Fold a PING/PONG round trip into the smoothed RTT"""
+    global rtt_estimate
+    sample = time.monotonic() - last_ping_sent
+    if 0 < sample < HEARTBEAT_TIMEOUT:
+        rtt_estimate = 0.8 * rtt_estimate + 0.2 * sample
+
+def handle_message(message):
+    """Handle a single message from Pi Zero"""
+    global target_resolution, stream_resolution, resolution_detected, stream_reconnect_flag, resync_pending, zoom_region, current_quality
+    eventlog.record_event("recv", message)
+    recv_log.debug("RECV %s", message)
+
+    if message.startswith("QUALITY:"):
+        pi_quality = message.split(':')[1]
+        if resync_pending and pi_quality != current_quality:
+            log.info("Resyncing quality %s (Pi has %s)", current_quality, pi_quality)
+            send(f"SET_QUALITY:{current_quality}")
+        else:
+            current_quality = pi_quality
+        root.after(0, update_resolution_display)
+    elif message.startswith("RESOLUTION:"):
+        parts = message.split(':')
+        if len(parts) >= 3:
+            width = int(parts[1])
+            height = int(parts[2])
+            if resync_pending and (width, height) != target_resolution:
+                log.info("Resyncing target resolution %sx%s (Pi has %sx%s)", target_resolution[0], target_resolution[1], width, height)
+                send(f"SET_RESOLUTION:{target_resolution[0]}:{target_resolution[1]}")
+            else:
+                target_resolution = (width, height)
+                log.info("Target PC resolution set to: %sx%s", width, height)
+            root.after(0, update_resolution_display)
+    elif message.startswith("ZOOM:"):
+        parts = message.split(':')
+        pi_zoom = tuple(int(p) for p in parts[1:5]) if len(parts) >= 5 else None
+        if resync_pending and pi_zoom != zoom_region:
+            log.info("Resyncing zoom %s (Pi has %s)", zoom_region, pi_zoom)
+            send("SET_ZOOM:{}:{}:{}:{}".format(*zoom_region) if zoom_region else "SET_ZOOM:OFF")
+        else:
+            zoom_region = pi_zoom
+            log.info("Zoom region set to: %s", zoom_region)
+        root.after(0, update_resolution_display)
+    elif message.startswith("STREAM_RESOLUTION:"):
+        parts = message.split(':')
+        if len(parts) >= 3:
+            width = int(parts[1])
+            height = int(parts[2])
+            old_resolution = stream_resolution
+            stream_resolution = (width, height)
+            resolution_detected = True
+            resync_pending = False  # Last line of the greeting
+            log.info("Stream resolution changed to: %sx%s", width, height)
+
+            # Trigger stream reconnection if resolution actually changed
+            if old_resolution != stream_resolution:
+                log.info("Triggering stream reconnection...")
+                stream_reconnect_flag = True
+
+            root.after(0, update_resolution_display)
 
 # ---------------- TKINTER GUI ----------------
 root = tk.Tk()
@@ -100,10 +292,11 @@ menubar.add_cascade(label="Target Resolution", menu=resolution_menu)
 
 def set_resolution(width, height):
     """Set target resolution and notify Pi Zero"""
-    global target_resolution
+    global target_resolution, zoom_region
     target_resolution = (width, height)
+    zoom_region = None  # The Pi drops the zoom when the target resolution changes
     send(f"SET_RESOLUTION:{width}:{height}")
-    print(f"[INFO] Manually set target resolution to {width}x{height}")
+    log.info("Manually set target resolution to %sx%s", width, height)
     update_resolution_display()
 
 # Common target resolutions
@@ -125,7 +318,7 @@ def set_quality(quality_preset):
     global current_quality, stream_reconnect_flag
     current_quality = quality_preset
     send(f"SET_QUALITY:{quality_preset}")
-    print(f"[INFO] Set quality to {quality_preset}")
+    log.info("Set quality to %s", quality_preset)
     update_resolution_display()
     
     # Trigger stream reconnection after brief delay
@@ -133,7 +326,7 @@ def set_quality(quality_preset):
         time.sleep(1)  # Give Pi time to reconfigure
         global stream_reconnect_flag
         stream_reconnect_flag = True
-        print("[INFO] Triggering stream reconnection for quality change...")
+        log.info("Triggering stream reconnection for quality change...")
     
     threading.Thread(target=delayed_reconnect, daemon=True).start()
 
@@ -141,6 +334,17 @@ quality_menu.add_command(label="720p (Best Quality)", command=lambda: set_qualit
 quality_menu.add_command(label="480p (Balanced)", command=lambda: set_quality("480p"), accelerator="F2")
 quality_menu.add_command(label="360p (Low Latency)", command=lambda: set_quality("360p"), accelerator="F3")
 
+# Zoom menu
+zoom_menu = Menu(menubar, tearoff=0)
+menubar.add_cascade(label="Zoom", menu=zoom_menu)
+zoom_menu.add_command(label="Select Region...", command=lambda: start_zoom_selection(), accelerator="Ctrl+9")
+zoom_menu.add_command(label="Reset Zoom", command=lambda: clear_zoom(), accelerator="Ctrl+0")
+
+# Debug menu
+debug_menu = Menu(menubar, tearoff=0)
+menubar.add_cascade(label="Debug", menu=debug_menu)
+debug_menu.add_command(label="Dump Recent Events", command=eventlog.dump_recent)
+
 # Bind keyboard shortcuts for resolution
 root.bind('<Control-Key-1>', lambda e: set_resolution(1920, 1080))
 root.bind('<Control-Key-2>', lambda e: set_resolution(1280, 720))
@@ -150,18 +354,27 @@ root.bind('<Control-Key-5>', lambda e: set_resolution(1024, 768))
 root.bind('<Control-Key-6>', lambda e: set_resolution(1280, 1024))
 root.bind('<Control-Key-7>', lambda e: set_resolution(1600, 1200))
 
+# Bind keyboard shortcuts for zoom
+root.bind('<Control-Key-9>', lambda e: start_zoom_selection())
+root.bind('<Control-Key-0>', lambda e: clear_zoom())
+
 # Bind keyboard shortcuts for quality
 root.bind('<F1>', lambda e: set_quality("720p"))
 root.bind('<F2>', lambda e: set_quality("480p"))
 root.bind('<F3>', lambda e: set_quality("360p"))
 
-# Create a frame to hold the label
+# Create a frame to hold the video canvas
 frame = tk.Frame(root, bg='black')
 frame.pack(fill=tk.BOTH, expand=True)
 
-# Label with black background to reduce flicker
-label = tk.Label(frame, bg='black')
-label.pack(fill=tk.BOTH, expand=True)
+# Canvas with black background to reduce flicker. The frame is one image item
+# and the cursor overlay is a separate item, so moving the overlay never
+# touches the frame image.
+canvas = tk.Canvas(frame, bg='black', highlightthickness=0)
+canvas.pack(fill=tk.BOTH, expand=True)
+frame_item = canvas.create_image(0, 0, anchor='nw')
+if CURSOR_OVERLAY:
+    canvas.config(cursor='none')
 
 # Status label for resolution info
 status_label = tk.Label(root, text="", bg='gray20', fg='white', anchor='w')
@@ -170,55 +383,28 @@ status_label.pack(side=tk.BOTTOM, fill=tk.X)
 def update_resolution_display():
     """Update the status bar with resolution info"""
     status_text = f"Quality: {current_quality} | Target: {target_resolution[0]}x{target_resolution[1]} | Stream: {stream_resolution[0]}x{stream_resolution[1]}"
-    if target_resolution != stream_resolution:
-        scale_x = target_resolution[0] / stream_resolution[0]
-        scale_y = target_resolution[1] / stream_resolution[1]
+    if zoom_region:
+        status_text += f" | Zoom: {zoom_region[2]}x{zoom_region[3]}+{zoom_region[0]}+{zoom_region[1]}"
+    view_w, view_h = view_region()[2:]
+    if (view_w, view_h) != stream_resolution:
+        scale_x = view_w / stream_resolution[0]
+        scale_y = view_h / stream_resolution[1]
         status_text += f" | Scale: {scale_x:.2f}x, {scale_y:.2f}y"
+    if sock is None:
+        status_text += " | Disconnected, reconnecting..."
     status_label.config(text=status_text)
 
 # Set focus to ensure keyboard events are captured
-label.focus_set()
+canvas.focus_set()
 
 # Store current image dimensions
 current_img = None
 current_aspect_ratio = 16/9
+display_rect = (0, 0, 1, 1)   # x, y, width, height of the frame on the canvas
 
 # ---------------- KEY MAPPING ----------------
-key_map = {
-    "Return": "ENTER",
-    "Escape": "ESC",
-    "BackSpace": "BACKSPACE",
-    "Tab": "TAB",
-    "space": "SPACE",
-    "Left": "LEFT",
-    "Right": "RIGHT",
-    "Up": "UP",
-    "Down": "DOWN",
-    "F1": "F1",
-    "F2": "F2",
-    "F3": "F3",
-    "F4": "F4",
-    "F5": "F5",
-    "F6": "F6",
-    "F7": "F7",
-    "F8": "F8",
-    "F9": "F9",
-    "F10": "F10",
-    "F11": "F11",
-    "F12": "F12",
-    "Super_L": "WIN",
-    "Super_R": "RWIN",
-    "Shift_L": "SHIFT",
-    "Shift_R": "SHIFT",
-    "Control_L": "CTRL",
-    "Control_R": "CTRL",
-    "Alt_L": "ALT",
-    "Alt_R": "ALT",
-}
-
-# Keep track of currently pressed modifiers
-pressed_modifiers = set()
-backtick_pressed = False
+# Held modifiers and backtick mouse keys, shared with fleet.py
+keys = inputmap.KeyTranslator()
 
 # Track last mouse position for relative movement
 last_mouse_x = 0
@@ -249,7 +435,8 @@ root.bind('<Configure>', on_resize)
 
 def update_image_display(img):
     """Update the image display with proper scaling"""
-    global current_img, current_aspect_ratio, stream_resolution, resolution_detected
+    global current_img, current_aspect_ratio, stream_resolution, resolution_detected, display_rect
+    new_frame = img is not current_img
     current_img = img
     current_aspect_ratio = img.width / img.height
     
@@ -257,13 +444,13 @@ def update_image_display(img):
     if (img.width, img.height) != stream_resolution:
         stream_resolution = (img.width, img.height)
         resolution_detected = True
-        print(f"[INFO] Stream resolution detected: {img.width}x{img.height}")
+        log.info("Stream resolution detected: %sx%s", img.width, img.height)
         update_resolution_display()
     
-    # Get current label dimensions
-    label.update_idletasks()
-    width = label.winfo_width()
-    height = label.winfo_height()
+    # Get current canvas dimensions
+    canvas.update_idletasks()
+    width = canvas.winfo_width()
+    height = canvas.winfo_height()
     
     # Calculate fitted size
     if width > 1 and height > 1:
@@ -274,104 +461,250 @@ def update_image_display(img):
         imgtk = ImageTk.PhotoImage(img_resized)
         
         # Keep a reference to prevent garbage collection
-        label.imgtk = imgtk
-        label.configure(image=imgtk)
-
-# ---------------- EVENT HANDLERS ----------------
-def on_key(event):
-    global backtick_pressed
-    
-    key = event.keysym
+        canvas.imgtk = imgtk
+        
+        # Center the frame on the canvas
+        display_rect = ((width - new_width) // 2, (height - new_height) // 2, new_width, new_height)
+        canvas.coords(frame_item, display_rect[0], display_rect[1])
+        canvas.itemconfig(frame_item, image=imgtk)
     
-    # Track backtick press
-    if key == 'grave' or event.char == '`':
-        backtick_pressed = True
+    if new_frame:
+        reconcile_cursor_overlay(img)
+    elif CURSOR_OVERLAY and pending_moves:
+        draw_cursor_overlay()
+
+# ---------------- LOCAL CURSOR OVERLAY ----------------
+# Pointer moves take RTT + capture + a frame interval to show up in the video.
+# Meanwhile the overlay is drawn where the target cursor should be: the last
+# estimate plus every move sent since, clamped to the screen like the real
+# cursor. Each move is acknowledged once a frame arrives late enough to
+# include it. When the last move is acknowledged, the frame is compared with
+# the one from before the motion started. The small changed region nearest
+# the estimate holds the real cursor, and the estimate snaps to it. The
+# overlay then hides, since the frame shows the cursor where the estimate
+# now is.
+cursor_estimate = [target_resolution[0] / 2, target_resolution[1] / 2]
+cursor_locked = False         # True once the estimate has been matched to a frame
+rest_frame = None             # Last frame before the current motion began
+rest_estimate = (0, 0)        # cursor_estimate when rest_frame was taken
+pending_moves = deque()       # send times of moves not yet visible in a frame
+last_frame_time = 0
+frame_interval = 0.1          # Smoothed time between frames, seconds
+
+CURSOR_SHAPE = [(0, 0), (0, 16), (4, 12), (7, 19), (10, 18), (7, 11), (12, 11)]
+cursor_item = canvas.create_polygon(0, 0, 0, 0, fill='white', outline='black', state='hidden')
+
+def draw_cursor_overlay():
+    """Move the overlay to the current estimate (a coords() call, no image work)"""
+    x0, y0, w, h = display_rect
+    vx, vy, vw, vh = view_region()
+    if not (vx <= cursor_estimate[0] < vx + vw and vy <= cursor_estimate[1] < vy + vh):
+        canvas.itemconfig(cursor_item, state='hidden')
+        return
+    x = x0 + (cursor_estimate[0] - vx) * w / vw
+    y = y0 + (cursor_estimate[1] - vy) * h / vh
+    canvas.coords(cursor_item, *[c for px, py in CURSOR_SHAPE for c in (x + px, y + py)])
+    canvas.itemconfig(cursor_item, state='normal')
+    canvas.tag_raise(cursor_item)
+
+def predict_cursor_move(dx, dy):
+    """Apply a MOUSE:MOVE (target pixels) to the local estimate"""
+    global rest_frame, rest_estimate
+    if not CURSOR_OVERLAY:
         return
+    if not pending_moves:
+        rest_frame = current_img
+        rest_estimate = tuple(cursor_estimate)
+    cursor_estimate[0] = min(max(cursor_estimate[0] + dx, 0), target_resolution[0] - 1)
+    cursor_estimate[1] = min(max(cursor_estimate[1] + dy, 0), target_resolution[1] - 1)
+    pending_moves.append(time.monotonic())
+    draw_cursor_overlay()
+
+def find_changed_regions(before, after):
+    """Bounding boxes of small changed regions between two frames"""
+    diff = ImageChops.difference(before.convert('L'), after.convert('L'))
+    mask = diff.point(lambda v: 255 if v > CURSOR_DIFF_THRESHOLD else 0)
+    if not mask.getbbox():
+        return []
     
-    # If backtick is held, handle arrow keys as mouse movement
-    if backtick_pressed:
-        speed = MOUSE_SPEED_SLOW if "Shift_L" in pressed_modifiers or "Shift_R" in pressed_modifiers else MOUSE_SPEED_FAST
-        
-        if key == 'Up':
-            send(f"MOUSE:MOVE:0:{-speed}")
-            return
-        elif key == 'Down':
-            send(f"MOUSE:MOVE:0:{speed}")
-            return
-        elif key == 'Left':
-            send(f"MOUSE:MOVE:{-speed}:0")
-            return
-        elif key == 'Right':
-            send(f"MOUSE:MOVE:{speed}:0")
-            return
-        elif key == 'Return':
-            send("MOUSE:CLICK")
-            return
-        elif key == 'BackSpace':
-            send("MOUSE:RCLICK")
-            return
-        elif key == 'bracketleft' or event.char == '[':
-            send("MOUSE:SCROLL:1")
-            return
-        elif key == 'bracketright' or event.char == ']':
-            send("MOUSE:SCROLL:-1")
-            return
+    # Group changed pixels on a coarse grid, then flood-fill the grid cells
+    gw, gh = max(mask.width // CURSOR_GRID, 1), max(mask.height // CURSOR_GRID, 1)
+    cells = mask.resize((gw, gh), Image.Resampling.BOX).getdata()
+    active = {(i % gw, i // gw) for i, v in enumerate(cells) if v}
+    regions = []
+    while active:
+        stack = [active.pop()]
+        cx0, cy0, cx1, cy1 = stack[0] * 2
+        while stack:
+            cx, cy = stack.pop()
+            cx0, cy0, cx1, cy1 = min(cx0, cx), min(cy0, cy), max(cx1, cx), max(cy1, cy)
+            for nx in (cx - 1, cx, cx + 1):
+                for ny in (cy - 1, cy, cy + 1):
+                    if (nx, ny) in active:
+                        active.remove((nx, ny))
+                        stack.append((nx, ny))
+        box = (cx0 * CURSOR_GRID, cy0 * CURSOR_GRID, (cx1 + 1) * CURSOR_GRID, (cy1 + 1) * CURSOR_GRID)
+        exact = mask.crop(box).getbbox()
+        if exact:
+            x0, y0, x1, y1 = exact
+            if x1 - x0 <= CURSOR_MAX_SIZE and y1 - y0 <= CURSOR_MAX_SIZE:
+                regions.append((box[0] + x0, box[1] + y0, box[0] + x1, box[1] + y1))
+    return regions
+
+def cursor_hotspot(box, mx, my):
+    """Where the moved cursor's hotspot is in a changed region (stream pixels).
     
-    # Normal keyboard handling
-    key_to_send = key_map.get(key, event.char)
+    An arrow cursor's hotspot is the top-left of its bounding box. After a
+    small move the old and new cursor merge into one region, so on the axes
+    the pointer moved right or down the new top-left is the move away from
+    the region's corner.
+    """
+    x0, y0, x1, y1 = box
+    hx = x0 + mx if mx > 0 and x1 - x0 > mx else x0
+    hy = y0 + my if my > 0 and y1 - y0 > my else y0
+    return hx, hy
+
+def correct_cursor_estimate(before, after, moved):
+    """Snap the estimate to the cursor as seen in the frame.
     
-    if event.char == ' ' and key != 'space':
-        key_to_send = 'SPACE'
+    moved is the net pointer move since `before`, in target pixels.
+    """
+    global cursor_locked
+    if before is None or before.size != after.size:
+        return
+    vx, vy, vw, vh = view_region()
+    sx, sy = after.width / vw, after.height / vh
+    ex, ey = (cursor_estimate[0] - vx) * sx, (cursor_estimate[1] - vy) * sy
     
-    if not key_to_send:
+    # The cursor's old and new spots both show up; the estimate is nearer the new one
+    regions = find_changed_regions(before, after)
+    if not regions:
         return
+    hotspots = [cursor_hotspot(box, moved[0] * sx, moved[1] * sy) for box in regions]
+    hx, hy = min(hotspots, key=lambda h: (h[0] - ex) ** 2 + (h[1] - ey) ** 2)
+    if cursor_locked and ((hx - ex) ** 2 + (hy - ey) ** 2) ** 0.5 > CURSOR_SNAP_RADIUS:
+        return
+    cursor_estimate[0] = vx + hx / sx
+    cursor_estimate[1] = vy + hy / sy
+    cursor_locked = True
+
+def reconcile_cursor_overlay(img):
+    """Drop moves the newest frame already shows; correct and hide the overlay when caught up"""
+    global last_frame_time, frame_interval
+    now = time.monotonic()
+    if last_frame_time:
+        frame_interval = 0.9 * frame_interval + 0.1 * min(now - last_frame_time, 1.0)
+    last_frame_time = now
+    
+    if not CURSOR_OVERLAY:
+        return
+    had_pending = bool(pending_moves)
+    latency = rtt_estimate + frame_interval + CURSOR_PIPELINE_DELAY
+    while pending_moves and pending_moves[0] + latency <= now:
+        pending_moves.popleft()
+    if pending_moves:
+        draw_cursor_overlay()
+    else:
+        if had_pending:
+            moved = (cursor_estimate[0] - rest_estimate[0], cursor_estimate[1] - rest_estimate[1])
+            correct_cursor_estimate(rest_frame, img, moved)
+        canvas.itemconfig(cursor_item, state='hidden')
+
+# ---------------- REGION-OF-INTEREST ZOOM ----------------
+# The Pi captures at full resolution and streams only zoom_region, so the
+# stream shows view_region() instead of the whole target screen.
+zoom_selecting = False
+zoom_drag_start = None
+zoom_rect_item = canvas.create_rectangle(0, 0, 0, 0, outline='yellow', dash=(4, 2), state='hidden')
+
+def view_region():
+    """Part of the target screen shown in the stream, in target pixels"""
+    return zoom_region or (0, 0, target_resolution[0], target_resolution[1])
+
+def display_to_target(x, y):
+    """Map a canvas position to target pixels"""
+    x0, y0, w, h = display_rect
+    vx, vy, vw, vh = view_region()
+    tx = vx + (min(max(x, x0), x0 + w) - x0) * vw / w
+    ty = vy + (min(max(y, y0), y0 + h) - y0) * vh / h
+    return int(tx), int(ty)
+
+def start_zoom_selection():
+    """Let the next drag on the video select a zoom region"""
+    global zoom_selecting
+    zoom_selecting = True
+    canvas.config(cursor='crosshair')
+    status_label.config(text="Drag a rectangle on the video to zoom | Esc to cancel")
+
+def end_zoom_selection():
+    global zoom_selecting, zoom_drag_start
+    zoom_selecting = False
+    zoom_drag_start = None
+    canvas.itemconfig(zoom_rect_item, state='hidden')
+    canvas.config(cursor='none' if CURSOR_OVERLAY else '')
+    update_resolution_display()
 
-    if key_to_send in ("CTRL", "SHIFT", "ALT", "WIN", "RWIN"):
-        if key not in pressed_modifiers:
-            pressed_modifiers.add(key)
-            send(f"KEY:{key_to_send}")
+def on_zoom_drag(event):
+    if zoom_drag_start:
+        canvas.coords(zoom_rect_item, *zoom_drag_start, event.x, event.y)
+        canvas.itemconfig(zoom_rect_item, state='normal')
+        canvas.tag_raise(zoom_rect_item)
+
+def on_zoom_release(event):
+    start = zoom_drag_start
+    end_zoom_selection()
+    if not start or abs(event.x - start[0]) < ZOOM_MIN_DRAG or abs(event.y - start[1]) < ZOOM_MIN_DRAG:
         return
+    x1, y1 = display_to_target(*start)
+    x2, y2 = display_to_target(event.x, event.y)
+    set_zoom(min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1))
 
-    if pressed_modifiers:
-        combo = '+'.join([key_map[k] for k in pressed_modifiers] + [key_to_send])
-        send(f"KEY:{combo}")
-    else:
-        send(f"KEY:{key_to_send}")
+def set_zoom(x, y, w, h):
+    """Ask the Pi to stream only this region (target pixels)"""
+    send(f"SET_ZOOM:{x}:{y}:{w}:{h}")
+    log.info("Requested zoom to %sx%s+%s+%s", w, h, x, y)
 
-def on_key_release(event):
-    global backtick_pressed
-    
-    key = event.keysym
-    
-    if key == 'grave' or event.char == '`':
-        backtick_pressed = False
+def clear_zoom():
+    send("SET_ZOOM:OFF")
+    log.info("Requested zoom reset")
+
+# ---------------- EVENT HANDLERS ----------------
+def on_key(event):
+    if zoom_selecting:
+        if event.keysym == 'Escape':
+            end_zoom_selection()
         return
     
-    key_to_send = key_map.get(key, None)
-    
-    if key_to_send in ("CTRL", "SHIFT", "ALT", "WIN", "RWIN"):
-        if key in pressed_modifiers:
-            pressed_modifiers.remove(key)
-            send(f"KEYUP:{key_to_send}")
+    cmd = keys.press(event.keysym, event.char)
+    if cmd:
+        send(cmd)
+        if cmd.startswith("MOUSE:MOVE:"):
+            _, _, dx, dy = cmd.split(':')
+            predict_cursor_move(int(dx), int(dy))
+
+def on_key_release(event):
+    cmd = keys.release(event.keysym, event.char)
+    if cmd:
+        send(cmd)
 
 def on_click(event):
-    label.focus_set()
+    global zoom_drag_start
+    canvas.focus_set()
+    if zoom_selecting:
+        if event.widget is canvas:
+            zoom_drag_start = (event.x, event.y)
+        return
     send("MOUSE:CLICK")
 
-def scale_mouse_movement(dx, dy):
-    """Scale mouse movement from stream coordinates to target PC coordinates"""
-    global stream_resolution, target_resolution
-    
-    if stream_resolution == target_resolution:
-        return dx, dy
-    
-    scale_x = target_resolution[0] / stream_resolution[0]
-    scale_y = target_resolution[1] / stream_resolution[1]
-    
-    scaled_dx = int(dx * scale_x)
-    scaled_dy = int(dy * scale_y)
-    
-    return scaled_dx, scaled_dy
+def on_drag(event):
+    if zoom_selecting:
+        on_zoom_drag(event)
+    else:
+        on_move(event)
+
+def on_release(event):
+    if zoom_selecting:
+        on_zoom_release(event)
 
 def on_move(event):
     global last_mouse_x, last_mouse_y
@@ -381,13 +714,18 @@ def on_move(event):
     last_mouse_x = event.x
     last_mouse_y = event.y
     
-    scaled_dx, scaled_dy = scale_mouse_movement(dx, dy)
+    if zoom_selecting:
+        return
+    
+    # The pointer moves across the frame as drawn, which is scaled to fit the canvas
+    scaled_dx, scaled_dy = inputmap.scale_mouse_movement(dx, dy, view_region()[2:], display_rect[2:])
     
     if abs(scaled_dx) > 0 or abs(scaled_dy) > 0:
         send(f"MOUSE:MOVE:{scaled_dx}:{scaled_dy}")
+        predict_cursor_move(scaled_dx, scaled_dy)
 
 def on_right_click(event):
-    label.focus_set()
+    canvas.focus_set()
     send("MOUSE:RCLICK")
 
 root.bind("<Button-3>", on_right_click)
@@ -395,6 +733,8 @@ root.bind("<Button-3>", on_right_click)
 root.bind("<KeyPress>", on_key)
 root.bind("<KeyRelease>", on_key_release)
 root.bind("<Button-1>", on_click)
+root.bind("<B1-Motion>", on_drag)
+root.bind("<ButtonRelease-1>", on_release)
 root.bind("<Motion>", on_move)
 
 # ---------------- MJPEG STREAM ----------------
@@ -404,14 +744,14 @@ def mjpeg_loop():
     
     while stream_active:
         try:
-            print("[DEBUG] Connecting to MJPEG stream...")
+            log.debug("Connecting to MJPEG stream...")
             r = requests.get(STREAM_URL, stream=True, timeout=5)
             bytes_buffer = b''
             
             for chunk in r.iter_content(chunk_size=1024):
                 # Check if reconnection is requested
                 if stream_reconnect_flag:
-                    print("[INFO] Stream reconnection requested, closing current connection...")
+                    log.info("Stream reconnection requested, closing current connection...")
                     stream_reconnect_flag = False
                     r.close()
                     time.sleep(0.5)  # Brief pause before reconnecting
@@ -428,27 +768,33 @@ def mjpeg_loop():
                     root.after(0, update_image_display, img)
                     
         except requests.exceptions.Timeout:
-            print("[WARNING] Stream connection timeout, retrying...")
+            log.warning("Stream connection timeout, retrying...")
             time.sleep(1)
         except Exception as e:
-            print(f"[ERROR] MJPEG stream failed: {e}")
+            log.warning("MJPEG stream failed: %s", e)
             if stream_active:
-                print("[INFO] Reconnecting in 2 seconds...")
+                log.info("Reconnecting in 2 seconds...")
                 time.sleep(2)
             else:
                 break
 
 threading.Thread(target=mjpeg_loop, daemon=True).start()
 
+# Start event connection manager thread
+threading.Thread(target=event_connection_loop, daemon=True).start()
+
 def on_closing():
     """Clean shutdown"""
     global stream_active
-    print("[DEBUG] Closing application...")
+    log.info("Closing application...")
     stream_active = False
-    sock.close()
+    with sock_lock:
+        if sock is not None:
+            sock.close()
     root.destroy()
 
 root.protocol("WM_DELETE_WINDOW", on_closing)
 root.mainloop()
 
-print("[DEBUG] Program finished")
\ No newline at end of file
+log.info("Program finished")
+eventlog.shutdown()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Non-blocking, leveled logging for client.py, zero.py and fleet.py.
+
+Records are handed to a QueueHandler and written by a background
+QueueListener thread, so a log call never waits on stdout/journald.
+Each category ("send", "recv", "uart", ...) is its own logger under
+"remotepi" with its own level. Hot-path categories default to WARNING,
+so per-event debug calls return after a level check.
+
+Input events are also kept in an in-memory ring buffer via record_event(),
+which costs one deque append. The ring is dumped on demand with
+dump_recent() and automatically when an ERROR is logged.
+
+Levels can be overridden at runtime with REMOTEPI_LOG, e.g.
+REMOTEPI_LOG="send=DEBUG,recv=INFO".
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from collections import deque
+
+LOG_FORMAT = "[%(levelname)s] %(message)s"
+RING_SIZE = 2000              # Recent events kept in memory
+RATE_LIMIT_INTERVAL = 1.0     # Seconds between repeats of the same message
+RATE_LIMIT_KEYS = 1000        # Distinct messages tracked before the table is reset
+ERROR_DUMP_INTERVAL = 10.0    # Minimum seconds between automatic ring dumps
+
+_root = logging.getLogger("remotepi")
+_listener = None
+_ring = deque(maxlen=RING_SIZE)
+_last_error_dump = 0
+
+# ---------------- RATE LIMITING ----------------
+class RateLimitFilter(logging.Filter):
+    """Pass one record per distinct message per interval, counting the repeats"""
+    def __init__(self, interval=RATE_LIMIT_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self.seen = {}   # (logger, message) -> [last_emit_time, suppressed]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or record.name == "remotepi.ring":
+            return True
+        # Keyed on the formatted text, so events that share a template but
+        # differ in their arguments (e.g. one per host) are all logged
+        key = (record.name, record.getMessage())
+        now = record.created
+        entry = self.seen.get(key)
+        if entry is None:
+            if len(self.seen) >= RATE_LIMIT_KEYS:
+                self.seen.clear()
+            self.seen[key] = [now, 0]
+            return True
+        if now - entry[0] < self.interval:
+            entry[1] += 1
+            return False
+        if entry[1]:
+            record.msg = f"{record.msg} ({entry[1]} similar suppressed)"
+        entry[0] = now
+        entry[1] = 0
+        return True
+
+# ---------------- RING BUFFER ----------------
+def record_event(category, text):
+    """Remember an event in the ring buffer without formatting or I/O"""
+    _ring.append((time.time(), category, text))
+
+def dump_recent(reason="requested"):
+    """Write the ring buffer contents to the log"""
+    entries = list(_ring)
+    out = get("ring")
+    out.warning("---- %d recent events (%s) ----", len(entries), reason)
+    for created, category, text in entries:
+        stamp = time.strftime("%H:%M:%S", time.localtime(created))
+        out.warning("%s.%03d %-6s %s", stamp, int(created * 1000) % 1000, category, text)
+    out.warning("---- end of recent events ----")
+
+class _ErrorDumpHandler(logging.Handler):
+    """Dump the ring buffer when an error is logged"""
+    def __init__(self):
+        super().__init__(logging.ERROR)
+
+    def emit(self, record):
+        global _last_error_dump
+        if record.name == "remotepi.ring" or record.created - _last_error_dump < ERROR_DUMP_INTERVAL:
+            return
+        _last_error_dump = record.created
+        dump_recent(f"after error in {record.name.split('.')[-1]}")
+
+# ---------------- SETUP ----------------
+def get(category):
+    """Logger for a category, e.g. get("send")"""
+    return logging.getLogger(f"remotepi.{category}")
+
+def parse_levels(spec):
+    """Parse "send=DEBUG,recv=INFO" into {"send": "DEBUG", "recv": "INFO"}"""
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            category, level = item.split('=', 1)
+            levels[category.strip()] = level.strip().upper()
+    return levels
+
+def setup(levels=None, default_level="INFO", stream=None):
+    """Start the background writer and apply per-category levels"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+    _root.setLevel(default_level)
+    _root.propagate = False
+    _root.addHandler(queue_handler)
+    _root.addHandler(_ErrorDumpHandler())
+
+    all_levels = dict(levels or {})
+    all_levels.update(parse_levels(os.environ.get("REMOTEPI_LOG", "")))
+    for category, level in all_levels.items():
+        get(category).setLevel(level)
+
+def shutdown():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
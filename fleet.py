@@ -0,0 +1,438 @@
+import tkinter as tk
+from tkinter import Menu
+from PIL import Image, ImageTk
+from io import BytesIO
+import asyncio
+import sys
+import threading
+import time
+import eventlog
+import inputmap
+
+# ---------------- CONFIGURATION ----------------
+EVENT_PORT = 5000
+STREAM_PORT = 8080
+STREAM_PATH = "/?action=stream"
+SNAPSHOT_PATH = "/?action=snapshot"
+TARGETS_FILE = "fleet_targets.txt"   # One Pi address per line, used when no args are given
+
+# Grid settings
+GRID_COLUMNS = 5
+THUMB_SIZE = (320, 180)    # Tile size in pixels
+THUMB_INTERVAL = 2.0       # Seconds between thumbnail refreshes per target
+
+# Connection pool settings
+MAX_STREAM_CONNECTIONS = 4   # Concurrent stream/snapshot connections shared by all targets
+CONNECT_TIMEOUT = 3
+RECONNECT_DELAY = 5
+HEARTBEAT_INTERVAL = 0.5    # zero.py drops event clients that stay silent
+
+# ---------------- LOGGING ----------------
+eventlog.setup({"send": "WARNING"})
+log = eventlog.get("fleet")
+send_log = eventlog.get("send")
+
+# ---------------- TARGETS ----------------
+def load_targets():
+    """Read Pi addresses from the command line or from TARGETS_FILE"""
+    if len(sys.argv) > 1:
+        return sys.argv[1:]
+    try:
+        with open(TARGETS_FILE) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    except OSError as e:
+        log.error("No targets given and could not read %s: %s", TARGETS_FILE, e)
+        eventlog.shutdown()
+        exit(1)
+
+class Target:
+    """State for one RemotePi unit"""
+    def __init__(self, host):
+        self.host = host
+        self.target_resolution = (1920, 1080)
+        self.stream_resolution = (1280, 720)
+        self.zoom_region = None     # (x, y, w, h) in target pixels while the Pi streams a crop
+        self.writer = None          # Pooled event connection, None while offline
+        self.last_frame_time = 0
+        self.tile = None
+
+    @property
+    def online(self):
+        return self.writer is not None
+
+    def view_region(self):
+        """Part of the target screen shown in the stream, in target pixels"""
+        return self.zoom_region or (0, 0, self.target_resolution[0], self.target_resolution[1])
+
+# ---------------- CONNECTION POOL ----------------
+class ConnectionPool:
+    """Event and stream connections for every target, driven by one asyncio loop.
+
+    Each target keeps a single persistent event connection. Stream traffic
+    (thumbnail snapshots and the interactive MJPEG stream) goes through a
+    shared semaphore so the number of open video connections stays bounded
+    no matter how many targets are in the fleet.
+    """
+    def __init__(self, targets):
+        self.targets = targets
+        self.loop = asyncio.new_event_loop()
+        self.stream_slots = None
+        self.interactive = None     # Target currently shown full-rate
+        self.running = True
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.stream_slots = asyncio.Semaphore(MAX_STREAM_CONNECTIONS)
+        for target in self.targets:
+            self.loop.create_task(self.event_connection(target))
+            self.loop.create_task(self.thumbnail_loop(target))
+        self.loop.run_forever()
+
+    def stop(self):
+        self.running = False
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    # ---- Event connections ----
+    async def event_connection(self, target):
+        """Keep an event connection open to one target and track its resolution"""
+        while self.running:
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(target.host, EVENT_PORT), CONNECT_TIMEOUT)
+                target.writer = writer
+                log.info("%s: event connection up", target.host)
+                refresh_tile_status(target)
+                heartbeat = self.loop.create_task(self.heartbeat(writer))
+
+                try:
+                    while self.running:
+                        line = await reader.readline()
+                        if not line:
+                            break
+                        self.handle_message(target, line.decode().strip())
+                finally:
+                    heartbeat.cancel()
+            except Exception as e:
+                log.warning("%s: event connection failed: %s", target.host, e)
+            finally:
+                if target.writer:
+                    target.writer.close()
+                    target.writer = None
+                    refresh_tile_status(target)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def heartbeat(self, writer):
+        while True:
+            writer.write(b"PING\n")
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    def handle_message(self, target, message):
+        parts = message.split(':')
+        if message.startswith("RESOLUTION:") and len(parts) >= 3:
+            target.target_resolution = (int(parts[1]), int(parts[2]))
+        elif message.startswith("ZOOM:"):
+            # Zoom set by client.py is kept on the Pi, so its stream may show only a region
+            target.zoom_region = tuple(int(p) for p in parts[1:5]) if len(parts) >= 5 else None
+            refresh_tile_status(target)
+        elif message.startswith("STREAM_RESOLUTION:") and len(parts) >= 3:
+            target.stream_resolution = (int(parts[1]), int(parts[2]))
+            if target is self.interactive:
+                # Stream restarts on the Pi after a resolution change
+                self.loop.create_task(self.restart_interactive_stream())
+
+    def send(self, target, cmd):
+        """Queue a command on the target's event connection (callable from any thread)"""
+        def write():
+            if target.writer:
+                target.writer.write((cmd + "\n").encode())
+                eventlog.record_event("send", f"{target.host} {cmd}")
+                send_log.debug("SEND %s %s", target.host, cmd)
+        self.loop.call_soon_threadsafe(write)
+
+    # ---- Thumbnails ----
+    async def fetch_snapshot(self, target):
+        """Fetch a single JPEG frame through the shared stream pool"""
+        async with self.stream_slots:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(target.host, STREAM_PORT), CONNECT_TIMEOUT)
+            try:
+                writer.write(f"GET {SNAPSHOT_PATH} HTTP/1.0\r\nHost: {target.host}\r\n\r\n".encode())
+                data = await asyncio.wait_for(reader.read(), CONNECT_TIMEOUT)
+            finally:
+                writer.close()
+        _, _, body = data.partition(b'\r\n\r\n')
+        return body
+
+    async def thumbnail_loop(self, target):
+        """Refresh a target's tile at THUMB_INTERVAL while the grid is visible"""
+        # Spread the first requests so the fleet doesn't refresh in lockstep
+        await asyncio.sleep(THUMB_INTERVAL * self.targets.index(target) / len(self.targets))
+        while self.running:
+            started = time.monotonic()
+            if self.interactive is None:
+                try:
+                    jpg = await self.fetch_snapshot(target)
+                    img = decode_thumbnail(jpg)
+                    target.last_frame_time = time.time()
+                    root.after(0, update_tile_image, target, img)
+                except Exception as e:
+                    log.warning("%s: thumbnail failed: %s", target.host, e)
+            await asyncio.sleep(max(0, THUMB_INTERVAL - (time.monotonic() - started)))
+
+    # ---- Interactive stream ----
+    def open_interactive(self, target):
+        self.interactive = target
+        self.loop.call_soon_threadsafe(self._start_interactive_task)
+
+    def close_interactive(self):
+        self.interactive = None
+        self.loop.call_soon_threadsafe(self._cancel_interactive_task)
+
+    def _start_interactive_task(self):
+        self._cancel_interactive_task()
+        self.interactive_task = self.loop.create_task(self.interactive_stream(self.interactive))
+
+    def _cancel_interactive_task(self):
+        task = getattr(self, 'interactive_task', None)
+        if task:
+            task.cancel()
+            self.interactive_task = None
+
+    async def restart_interactive_stream(self):
+        await asyncio.sleep(1)  # Give Pi time to restart mjpg_streamer
+        if self.interactive:
+            self._start_interactive_task()
+
+    async def interactive_stream(self, target):
+        """Full-rate MJPEG stream for the target being controlled"""
+        while self.running and self.interactive is target:
+            try:
+                async with self.stream_slots:
+                    log.debug("%s: connecting to MJPEG stream...", target.host)
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(target.host, STREAM_PORT), CONNECT_TIMEOUT)
+                    try:
+                        writer.write(f"GET {STREAM_PATH} HTTP/1.0\r\nHost: {target.host}\r\n\r\n".encode())
+                        bytes_buffer = b''
+                        while self.interactive is target:
+                            chunk = await reader.read(16384)
+                            if not chunk:
+                                break
+                            bytes_buffer += chunk
+                            a = bytes_buffer.find(b'\xff\xd8')
+                            b = bytes_buffer.find(b'\xff\xd9', a)
+                            if a != -1 and b != -1:
+                                jpg = bytes_buffer[a:b+2]
+                                bytes_buffer = bytes_buffer[b+2:]
+                                img = Image.open(BytesIO(jpg))
+                                root.after(0, update_interactive_image, target, img)
+                    finally:
+                        writer.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("%s: MJPEG stream failed: %s", target.host, e)
+            await asyncio.sleep(2)
+
+def decode_thumbnail(jpg):
+    """Decode a JPEG at reduced scale for a tile.
+
+    draft() lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding, so most
+    of the IDCT work for a thumbnail is skipped entirely.
+    """
+    img = Image.open(BytesIO(jpg))
+    img.draft('RGB', THUMB_SIZE)
+    img.thumbnail(THUMB_SIZE)
+    return img
+
+# ---------------- TKINTER GUI ----------------
+targets = [Target(host) for host in load_targets()]
+pool = ConnectionPool(targets)
+
+root = tk.Tk()
+root.title(f"Remote Pi Fleet ({len(targets)} targets)")
+root.geometry("1280x768")
+root.configure(bg='black')
+
+menubar = Menu(root)
+root.config(menu=menubar)
+view_menu = Menu(menubar, tearoff=0)
+menubar.add_cascade(label="View", menu=view_menu)
+
+grid_frame = tk.Frame(root, bg='black')
+grid_frame.pack(fill=tk.BOTH, expand=True)
+
+interactive_frame = tk.Frame(root, bg='black')
+interactive_label = tk.Label(interactive_frame, bg='black')
+interactive_label.pack(fill=tk.BOTH, expand=True)
+interactive_display_size = (1, 1)   # Size the interactive frame is drawn at
+
+status_label = tk.Label(root, text="", bg='gray20', fg='white', anchor='w')
+status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+def build_grid():
+    # Tk sizes a Label without an image in characters, so every tile starts
+    # with a blank image to keep offline units at THUMB_SIZE pixels
+    grid_frame.placeholder = ImageTk.PhotoImage(Image.new('RGB', THUMB_SIZE))
+    for i, target in enumerate(targets):
+        tile = tk.Frame(grid_frame, bg='gray10', bd=1, relief=tk.SOLID)
+        tile.grid(row=i // GRID_COLUMNS, column=i % GRID_COLUMNS, padx=2, pady=2)
+        image_label = tk.Label(tile, bg='black', image=grid_frame.placeholder,
+                               width=THUMB_SIZE[0], height=THUMB_SIZE[1])
+        image_label.pack()
+        caption = tk.Label(tile, text=f"{target.host} (connecting)", bg='gray10', fg='white')
+        caption.pack(fill=tk.X)
+        for widget in (tile, image_label, caption):
+            widget.bind("<Button-1>", lambda e, t=target: enter_interactive(t))
+        target.tile = (image_label, caption)
+
+def refresh_tile_status(target):
+    """Update a tile caption (callable from the pool thread)"""
+    def update():
+        if target.tile:
+            state = "online" if target.online else "offline"
+            if target.online and target.zoom_region:
+                state += ", zoomed"
+            target.tile[1].config(text=f"{target.host} ({state})", fg='white' if target.online else 'gray50')
+    root.after(0, update)
+
+def update_tile_image(target, img):
+    image_label = target.tile[0]
+    imgtk = ImageTk.PhotoImage(img)
+    image_label.imgtk = imgtk
+    image_label.configure(image=imgtk, width=THUMB_SIZE[0], height=THUMB_SIZE[1])
+
+def update_status():
+    online = sum(1 for t in targets if t.online)
+    if pool.interactive:
+        t = pool.interactive
+        zoom = f" | Zoom: {t.zoom_region[2]}x{t.zoom_region[3]}+{t.zoom_region[0]}+{t.zoom_region[1]}" if t.zoom_region else ""
+        status_label.config(text=f"Interactive: {t.host} | Target: {t.target_resolution[0]}x{t.target_resolution[1]} "
+                                 f"| Stream: {t.stream_resolution[0]}x{t.stream_resolution[1]}{zoom} | Esc-Esc or View menu: back to grid")
+    else:
+        status_label.config(text=f"Fleet: {online}/{len(targets)} online | Click a tile to take control")
+    root.after(1000, update_status)
+
+# ---------------- INTERACTIVE MODE ----------------
+def enter_interactive(target):
+    global interactive_display_size
+    log.info("Switching %s to interactive mode", target.host)
+    grid_frame.pack_forget()
+    interactive_frame.pack(fill=tk.BOTH, expand=True)
+    interactive_label.configure(image='')
+    interactive_display_size = (1, 1)
+    interactive_label.focus_set()
+    pool.open_interactive(target)
+
+def leave_interactive():
+    if pool.interactive is None:
+        return
+    log.info("Leaving interactive mode for %s", pool.interactive.host)
+    release_modifiers()
+    pool.close_interactive()
+    interactive_frame.pack_forget()
+    grid_frame.pack(fill=tk.BOTH, expand=True)
+
+view_menu.add_command(label="Back to Grid", command=leave_interactive)
+
+def update_interactive_image(target, img):
+    global interactive_display_size
+    if pool.interactive is not target:
+        return
+    width = interactive_label.winfo_width()
+    height = interactive_label.winfo_height()
+    if width > 1 and height > 1:
+        img_aspect = img.width / img.height
+        if img_aspect > width / height:
+            new_size = (width, int(width / img_aspect))
+        else:
+            new_size = (int(height * img_aspect), height)
+        imgtk = ImageTk.PhotoImage(img.resize(new_size, Image.Resampling.BILINEAR))
+        interactive_label.imgtk = imgtk
+        interactive_label.configure(image=imgtk)
+        interactive_display_size = new_size
+
+# ---------------- INPUT FORWARDING ----------------
+keys = inputmap.KeyTranslator()
+last_escape_time = 0
+last_mouse_x = 0
+last_mouse_y = 0
+
+def send(cmd):
+    if pool.interactive:
+        pool.send(pool.interactive, cmd)
+
+def release_modifiers():
+    for cmd in keys.release_all():
+        send(cmd)
+
+def on_key(event):
+    global last_escape_time
+    if pool.interactive is None:
+        return
+
+    # Double Escape returns to the grid; a single one is still forwarded
+    if event.keysym == 'Escape':
+        now = time.monotonic()
+        if now - last_escape_time < 0.5:
+            leave_interactive()
+            return
+        last_escape_time = now
+
+    cmd = keys.press(event.keysym, event.char)
+    if cmd:
+        send(cmd)
+
+def on_key_release(event):
+    cmd = keys.release(event.keysym, event.char)
+    if cmd:
+        send(cmd)
+
+def on_move(event):
+    global last_mouse_x, last_mouse_y
+    dx = event.x - last_mouse_x
+    dy = event.y - last_mouse_y
+    last_mouse_x = event.x
+    last_mouse_y = event.y
+
+    target = pool.interactive
+    if target is None:
+        return
+    # The pointer moves across the frame as drawn, which is scaled to fit the label
+    scaled_dx, scaled_dy = inputmap.scale_mouse_movement(dx, dy, target.view_region()[2:], interactive_display_size)
+    if scaled_dx or scaled_dy:
+        send(f"MOUSE:MOVE:{scaled_dx}:{scaled_dy}")
+
+def on_click(event):
+    interactive_label.focus_set()
+    send("MOUSE:CLICK")
+
+def on_right_click(event):
+    interactive_label.focus_set()
+    send("MOUSE:RCLICK")
+
+interactive_label.bind("<KeyPress>", on_key)
+interactive_label.bind("<KeyRelease>", on_key_release)
+interactive_label.bind("<Button-1>", on_click)
+interactive_label.bind("<Button-3>", on_right_click)
+interactive_label.bind("<Motion>", on_move)
+
+# ---------------- STARTUP ----------------
+def on_closing():
+    """Clean shutdown"""
+    log.info("Closing fleet viewer...")
+    pool.stop()
+    root.destroy()
+
+build_grid()
+pool.start()
+update_status()
+
+root.protocol("WM_DELETE_WINDOW", on_closing)
+root.mainloop()
+
+log.info("Program finished")
+eventlog.shutdown()
@@ -0,0 +1,124 @@
+"""Local keyboard and mouse input to RemotePi commands, shared by client.py and fleet.py.
+
+KeyTranslator turns Tk key events into KEY:/KEYUP:/MOUSE: commands. It
+tracks held modifiers, so they can be combined into chords like
+KEY:CTRL+c. It also tracks the backtick mouse-key mode: while ` is held,
+the arrows move the pointer, Enter/Backspace click and [ ] scroll.
+"""
+
+# Mouse keyboard control settings
+MOUSE_SPEED_SLOW = 5      # pixels per key press
+MOUSE_SPEED_FAST = 15     # pixels when holding Shift
+
+KEY_MAP = {
+    "Return": "ENTER",
+    "Escape": "ESC",
+    "BackSpace": "BACKSPACE",
+    "Tab": "TAB",
+    "space": "SPACE",
+    "Left": "LEFT",
+    "Right": "RIGHT",
+    "Up": "UP",
+    "Down": "DOWN",
+    "F1": "F1",
+    "F2": "F2",
+    "F3": "F3",
+    "F4": "F4",
+    "F5": "F5",
+    "F6": "F6",
+    "F7": "F7",
+    "F8": "F8",
+    "F9": "F9",
+    "F10": "F10",
+    "F11": "F11",
+    "F12": "F12",
+    "Super_L": "WIN",
+    "Super_R": "RWIN",
+    "Shift_L": "SHIFT",
+    "Shift_R": "SHIFT",
+    "Control_L": "CTRL",
+    "Control_R": "CTRL",
+    "Alt_L": "ALT",
+    "Alt_R": "ALT",
+}
+
+MODIFIERS = ("CTRL", "SHIFT", "ALT", "WIN", "RWIN")
+
+# Backtick mouse keys, by keysym or character
+MOUSE_KEY_MOVES = {'Up': (0, -1), 'Down': (0, 1), 'Left': (-1, 0), 'Right': (1, 0)}
+MOUSE_KEY_COMMANDS = {
+    'Return': "MOUSE:CLICK",
+    'BackSpace': "MOUSE:RCLICK",
+    'bracketleft': "MOUSE:SCROLL:1",
+    '[': "MOUSE:SCROLL:1",
+    'bracketright': "MOUSE:SCROLL:-1",
+    ']': "MOUSE:SCROLL:-1",
+}
+
+class KeyTranslator:
+    """Held-key state for one viewer; press()/release() return the command to send or None"""
+    def __init__(self):
+        self.pressed_modifiers = set()   # Tk keysyms, e.g. "Control_L"
+        self.backtick_pressed = False
+
+    def press(self, keysym, char):
+        if keysym == 'grave' or char == '`':
+            self.backtick_pressed = True
+            return None
+
+        # If backtick is held, handle arrow keys as mouse movement
+        if self.backtick_pressed:
+            shift = "Shift_L" in self.pressed_modifiers or "Shift_R" in self.pressed_modifiers
+            speed = MOUSE_SPEED_SLOW if shift else MOUSE_SPEED_FAST
+            if keysym in MOUSE_KEY_MOVES:
+                dx, dy = MOUSE_KEY_MOVES[keysym]
+                return f"MOUSE:MOVE:{dx * speed}:{dy * speed}"
+            command = MOUSE_KEY_COMMANDS.get(keysym) or MOUSE_KEY_COMMANDS.get(char)
+            if command:
+                return command
+
+        # Normal keyboard handling
+        key_to_send = KEY_MAP.get(keysym, char)
+        if char == ' ' and keysym != 'space':
+            key_to_send = 'SPACE'
+        if not key_to_send:
+            return None
+
+        if key_to_send in MODIFIERS:
+            if keysym in self.pressed_modifiers:
+                return None
+            self.pressed_modifiers.add(keysym)
+            return f"KEY:{key_to_send}"
+
+        if self.pressed_modifiers:
+            return "KEY:" + '+'.join([KEY_MAP[k] for k in self.pressed_modifiers] + [key_to_send])
+        return f"KEY:{key_to_send}"
+
+    def release(self, keysym, char):
+        if keysym == 'grave' or char == '`':
+            self.backtick_pressed = False
+            return None
+        if keysym in self.pressed_modifiers:
+            self.pressed_modifiers.remove(keysym)
+            return f"KEYUP:{KEY_MAP[keysym]}"
+        return None
+
+    def release_all(self):
+        """KEYUP commands for every held modifier, which are then forgotten"""
+        commands = [f"KEYUP:{KEY_MAP[k]}" for k in self.pressed_modifiers]
+        self.pressed_modifiers.clear()
+        self.backtick_pressed = False
+        return commands
+
+def scale_mouse_movement(dx, dy, view_size, display_size):
+    """Scale a pointer delta on the displayed frame to target pixels.
+
+    view_size is the part of the target screen shown in the stream, in
+    target pixels. display_size is the size the frame is drawn at, which
+    is what the local pointer moves across.
+    """
+    display_w, display_h = display_size
+    if display_w <= 1 or display_h <= 1:
+        # Nothing drawn yet
+        return dx, dy
+    return int(dx * view_size[0] / display_w), int(dy * view_size[1] / display_h)
@@ -3,6 +3,18 @@ import socket
 import time
 import subprocess
 import os
+import signal
+import shutil
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import eventlog
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # Only needed when a zoomed region must be scaled down
 
 # -------------------- CONFIG --------------------
 TX_GPIO = 21
@@ -10,6 +22,7 @@ BAUD = 19200
 
 HOST = "0.0.0.0"
 PORT = 5000
+CLIENT_TIMEOUT = 2  # Drop a client that sends nothing (not even PING) for this long
 
 # mjpeg-streamer configuration
 MJPEG_INPUT_PLUGIN = "input_uvc.so"
@@ -18,6 +31,15 @@ MJPEG_WWW_PATH = "./www"
 MJPEG_PORT = 8080
 MJPEG_FRAMERATE = 10
 
+# Region-of-interest zoom: mjpg_streamer captures at full resolution on an
+# internal port, and zero.py serves the cropped stream on MJPEG_PORT
+MJPEG_CAPTURE_PORT = 8081
+JPEGTRAN = shutil.which("jpegtran")
+JPEG_MCU_SIZE = 16       # Crop on whole MCUs so jpegtran never decodes
+ZOOM_MIN_SIZE = 64       # Smallest zoom region in target pixels
+ZOOM_JPEG_QUALITY = 80
+ZOOM_FRAME_TIMEOUT = 3   # Seconds an HTTP client waits for a cropped frame before 503
+
 # Quality presets - maps quality to max resolution tier
 QUALITY_PRESETS = {
     "720p": {
@@ -47,6 +69,11 @@ SUPPORTED_RESOLUTIONS = [
     (720, 576), (720, 480), (640, 480)
 ]
 
+# Per-category log levels; override at runtime with REMOTEPI_LOG="recv=DEBUG"
+LOG_LEVELS = {
+    "recv": "WARNING",   # every command received from the client
+}
+
 # Global process handle
 mjpeg_process = None
 current_quality = "720p"
@@ -54,9 +81,17 @@ target_w, target_h = 1920, 1080
 stream_w, stream_h = 1280, 720
 
 # -------------------- INIT --------------------
+eventlog.setup(LOG_LEVELS)
+log = eventlog.get("server")
+recv_log = eventlog.get("recv")
+
+# `kill -USR1 <pid>` writes the recent-event ring buffer to the journal
+signal.signal(signal.SIGUSR1, lambda signum, frame: eventlog.dump_recent("SIGUSR1"))
+
 pi = pigpio.pi()
 if not pi.connected:
-    print("Cannot connect to pigpio daemon")
+    log.error("Cannot connect to pigpio daemon")
+    eventlog.shutdown()
     exit(1)
 
 pi.set_mode(TX_GPIO, pigpio.OUTPUT)
@@ -77,14 +112,14 @@ def stop_mjpeg_streamer():
                 mjpeg_process.kill()
             mjpeg_process = None
         
-        print("[INFO] Stopped mjpg_streamer")
+        log.info("Stopped mjpg_streamer")
         time.sleep(1)
         return True
     except Exception as e:
-        print(f"[ERROR] Could not stop mjpeg-streamer: {e}")
+        log.error("Could not stop mjpeg-streamer: %s", e)
         return False
 
-def start_mjpeg_streamer(width, height):
+def start_mjpeg_streamer(width, height, port=MJPEG_PORT):
     """Start mjpeg-streamer with specified resolution"""
     global mjpeg_process
     
@@ -92,10 +127,10 @@ def start_mjpeg_streamer(width, height):
         cmd = [
             'mjpg_streamer',
             '-i', f'{MJPEG_INPUT_PLUGIN} -d /dev/video0 -r {width}x{height} -f {MJPEG_FRAMERATE}',
-            '-o', f'{MJPEG_OUTPUT_PLUGIN} -w {MJPEG_WWW_PATH} -p {MJPEG_PORT}'
+            '-o', f'{MJPEG_OUTPUT_PLUGIN} -w {MJPEG_WWW_PATH} -p {port}'
         ]
         
-        print(f"[INFO] Starting mjpg_streamer at {width}x{height}...")
+        log.info("Starting mjpg_streamer at %sx%s...", width, height)
         
         mjpeg_process = subprocess.Popen(
             cmd,
@@ -107,16 +142,16 @@ def start_mjpeg_streamer(width, height):
         time.sleep(2)
         
         if mjpeg_process.poll() is None:
-            print(f"[INFO] mjpg_streamer started successfully (PID: {mjpeg_process.pid})")
+            log.info("mjpg_streamer started successfully (PID: %s)", mjpeg_process.pid)
             return True
         else:
             stderr = mjpeg_process.stderr.read().decode()
-            print(f"[ERROR] mjpg_streamer failed to start: {stderr}")
+            log.error("mjpg_streamer failed to start: %s", stderr)
             mjpeg_process = None
             return False
             
     except Exception as e:
-        print(f"[ERROR] Could not start mjpeg-streamer: {e}")
+        log.error("Could not start mjpeg-streamer: %s", e)
         mjpeg_process = None
         return False
 
@@ -161,39 +196,273 @@ def find_closest_resolution(target_width, target_height, aspect_ratio, quality):
             candidates.append((res_w, res_h))
     
     if not candidates:
-        print(f"[WARN] No matching resolution found, using fallback")
+        log.warning("No matching resolution found, using fallback")
         return max_res
     
     candidates.sort(key=lambda x: x[0] * x[1], reverse=True)
     chosen = candidates[0]
     
-    print(f"[INFO] Chose {chosen[0]}x{chosen[1]} from {len(candidates)} candidates")
+    log.info("Chose %sx%s from %s candidates", chosen[0], chosen[1], len(candidates))
     return chosen
 
 def choose_stream_resolution(target_width, target_height, quality):
     """Choose best stream resolution based on target aspect ratio and quality"""
     aspect_ratio = calculate_aspect_ratio(target_width, target_height)
-    print(f"[INFO] Target: {target_width}x{target_height} | Aspect: {aspect_ratio} | Quality: {quality}")
+    log.info("Target: %sx%s | Aspect: %s | Quality: %s", target_width, target_height, aspect_ratio, quality)
     
     stream_w, stream_h = find_closest_resolution(target_width, target_height, aspect_ratio, quality)
-    print(f"[INFO] Selected stream resolution: {stream_w}x{stream_h}")
+    log.info("Selected stream resolution: %sx%s", stream_w, stream_h)
     
     return stream_w, stream_h
 
 def apply_resolution(target_w, target_h, quality):
     """Apply resolution based on aspect ratio matching and quality preset"""
-    global current_quality
+    global current_quality, zoom_region
     current_quality = quality
     
     stream_w, stream_h = choose_stream_resolution(target_w, target_h, quality)
     
-    print(f"[INFO] Applying capture resolution {stream_w}x{stream_h}")
+    log.info("Applying capture resolution %sx%s", stream_w, stream_h)
     
+    stop_zoom_proxy()
+    zoom_region = None
     stop_mjpeg_streamer()
     start_mjpeg_streamer(stream_w, stream_h)
     
     return target_w, target_h, stream_w, stream_h
 
+# -------------------- REGION-OF-INTEREST ZOOM --------------------
+zoom_region = None   # (x, y, w, h) in target pixels, None when not zoomed
+zoom_proxy = None
+
+def choose_capture_resolution(target_width, target_height):
+    """Highest supported capture mode with the target's aspect ratio"""
+    aspect_ratio = calculate_aspect_ratio(target_width, target_height)
+    candidates = [res for res in SUPPORTED_RESOLUTIONS if calculate_aspect_ratio(*res) == aspect_ratio]
+    return max(candidates or SUPPORTED_RESOLUTIONS, key=lambda res: res[0] * res[1])
+
+def plan_zoom(region, capture_w, capture_h, budget_pixels):
+    """Map a target-pixel region onto the capture frame.
+
+    Returns the MCU-aligned crop box in capture pixels, the DCT scale
+    denominator (1, 2, 4 or 8) to decode at, the output frame size (the
+    largest that fits budget_pixels), and the aligned region in target pixels.
+    """
+    x, y, w, h = region
+    w = min(max(w, ZOOM_MIN_SIZE), target_w)
+    h = min(max(h, ZOOM_MIN_SIZE), target_h)
+    x = min(max(x, 0), target_w - w)
+    y = min(max(y, 0), target_h - h)
+    
+    sx = capture_w / target_w
+    sy = capture_h / target_h
+    x0 = int(x * sx) // JPEG_MCU_SIZE * JPEG_MCU_SIZE
+    y0 = int(y * sy) // JPEG_MCU_SIZE * JPEG_MCU_SIZE
+    x1 = min(-(-int((x + w) * sx) // JPEG_MCU_SIZE) * JPEG_MCU_SIZE, capture_w)
+    y1 = min(-(-int((y + h) * sy) // JPEG_MCU_SIZE) * JPEG_MCU_SIZE, capture_h)
+    crop_w, crop_h = x1 - x0, y1 - y0
+    
+    # Largest output that fits the budget, then the coarsest DCT scale that
+    # still decodes at least that many pixels; resize() covers the rest
+    fit = min(1.0, (budget_pixels / (crop_w * crop_h)) ** 0.5)
+    out_w, out_h = max(int(crop_w * fit), 1), max(int(crop_h * fit), 1)
+    scale = 1
+    while scale < 8 and crop_w // (scale * 2) >= out_w and crop_h // (scale * 2) >= out_h:
+        scale *= 2
+    
+    aligned = (round(x0 / sx), round(y0 / sy), round(crop_w / sx), round(crop_h / sy))
+    return (x0, y0, crop_w, crop_h), scale, (out_w, out_h), aligned
+
+def crop_jpeg(jpg, box, scale, out_size):
+    """Crop one frame, staying in the DCT domain as far as possible.
+
+    jpegtran drops the DCT blocks outside an MCU-aligned box without
+    decoding anything. If the crop still exceeds the budget, PIL's draft()
+    lets libjpeg scale by 1/2, 1/4 or 1/8 during the IDCT, and only that
+    reduced image is resized to out_size and re-encoded.
+    """
+    x, y, w, h = box
+    if JPEGTRAN:
+        jpg = subprocess.run(
+            [JPEGTRAN, '-crop', f'{w}x{h}+{x}+{y}', '-copy', 'none'],
+            input=jpg, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout
+        if out_size == (w, h):
+            return jpg
+        img = Image.open(BytesIO(jpg))
+        img.draft('RGB', (w // scale, h // scale))
+    else:
+        img = Image.open(BytesIO(jpg))
+        full_width = img.width
+        img.draft('RGB', (img.width // scale, img.height // scale))
+        f = full_width / img.width
+        img = img.crop((int(x / f), int(y / f), int((x + w) / f), int((y + h) / f)))
+    
+    if img.size != out_size:
+        img = img.resize(out_size, Image.Resampling.BILINEAR)
+    out = BytesIO()
+    img.save(out, 'JPEG', quality=ZOOM_JPEG_QUALITY)
+    return out.getvalue()
+
+class ZoomStreamHandler(BaseHTTPRequestHandler):
+    """Serves cropped frames with the same URLs as mjpg_streamer's output_http"""
+    BOUNDARY = "boundarydonotcross"
+    
+    def do_GET(self):
+        proxy = self.server.proxy
+        try:
+            if "action=snapshot" in self.path:
+                frame, _ = proxy.wait_frame(0, ZOOM_FRAME_TIMEOUT)
+                if frame is None:
+                    self.send_error(503, "No cropped frame available")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(frame)))
+                self.end_headers()
+                self.wfile.write(frame)
+                return
+            
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace;boundary={self.BOUNDARY}")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            frame_id = 0
+            while proxy.running:
+                frame, new_id = proxy.wait_frame(frame_id, ZOOM_FRAME_TIMEOUT)
+                if frame is None:
+                    continue
+                frame_id = new_id
+                self.wfile.write(f"--{self.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(frame)}\r\n\r\n".encode())
+                self.wfile.write(frame)
+                self.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format, *args):
+        pass
+
+class ZoomProxy:
+    """Reads the full-resolution capture stream and republishes the crop"""
+    def __init__(self, capture_size, box, scale, out_size):
+        self.capture_size = capture_size
+        self.plan = (box, scale, out_size)
+        self.running = True
+        self.frame = None
+        self.frame_id = 0
+        self.cond = threading.Condition()
+        self.server = ThreadingHTTPServer((HOST, MJPEG_PORT), ZoomStreamHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+    
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.pump, daemon=True).start()
+    
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def retarget(self, box, scale, out_size):
+        """Switch to a new crop without restarting the capture"""
+        with self.cond:
+            self.plan = (box, scale, out_size)
+            self.frame = None  # Don't serve a frame cropped for the old region
+    
+    def wait_frame(self, last_id, timeout):
+        """Wait for a frame newer than last_id; returns (None, last_id) on timeout"""
+        with self.cond:
+            ready = self.cond.wait_for(
+                lambda: not self.running or (self.frame is not None and self.frame_id != last_id), timeout)
+            if not ready or not self.running:
+                return None, last_id
+            return self.frame, self.frame_id
+    
+    def pump(self):
+        url = f"http://127.0.0.1:{MJPEG_CAPTURE_PORT}/?action=stream"
+        while self.running:
+            try:
+                with urllib.request.urlopen(url, timeout=5) as r:
+                    bytes_buffer = b''
+                    while self.running:
+                        chunk = r.read1(16384)
+                        if not chunk:
+                            break
+                        bytes_buffer += chunk
+                        a = bytes_buffer.find(b'\xff\xd8')
+                        b = bytes_buffer.find(b'\xff\xd9', a)
+                        if a != -1 and b != -1:
+                            jpg = bytes_buffer[a:b+2]
+                            bytes_buffer = bytes_buffer[b+2:]
+                            plan = self.plan
+                            frame = crop_jpeg(jpg, *plan)
+                            with self.cond:
+                                if plan is not self.plan:
+                                    continue  # Retargeted while cropping
+                                self.frame = frame
+                                self.frame_id += 1
+                                self.cond.notify_all()
+            except Exception as e:
+                log.warning("Zoom capture stream failed: %s", e)
+                time.sleep(1)
+
+def stop_zoom_proxy():
+    global zoom_proxy
+    if zoom_proxy:
+        zoom_proxy.stop()
+        zoom_proxy = None
+        log.info("Stopped zoom proxy")
+
+def fall_back_from_zoom(quality, reason):
+    """Stream the whole screen again after a failed zoom; returns None like a refused zoom"""
+    global target_w, target_h, stream_w, stream_h
+    log.error("Zoom failed (%s), streaming the whole screen", reason)
+    target_w, target_h, stream_w, stream_h = apply_resolution(target_w, target_h, quality)
+    return None
+
+def apply_zoom(region, quality):
+    """Capture at full resolution and stream only the region, within the quality budget"""
+    global current_quality, zoom_region, zoom_proxy
+    
+    capture_w, capture_h = choose_capture_resolution(target_w, target_h)
+    budget_w, budget_h = choose_stream_resolution(target_w, target_h, quality)
+    box, scale, out_size, aligned = plan_zoom(region, capture_w, capture_h, budget_w * budget_h)
+    
+    if Image is None and (not JPEGTRAN or out_size != box[2:]):
+        log.error("Zoom needs jpegtran or Pillow for this region; install libjpeg-turbo-progs or python3-pil")
+        return None
+    
+    log.info("Zoom %sx%s+%s+%s: capture %sx%s, crop %sx%s+%s+%s, scale 1/%s, out %sx%s, %s",
+             aligned[2], aligned[3], aligned[0], aligned[1], capture_w, capture_h,
+             box[2], box[3], box[0], box[1], scale, out_size[0], out_size[1],
+             "lossless crop" if JPEGTRAN else "decode crop")
+    
+    current_quality = quality
+    if zoom_proxy and zoom_proxy.capture_size == (capture_w, capture_h):
+        # Already capturing at this mode, only the crop changes
+        zoom_proxy.retarget(box, scale, out_size)
+    else:
+        stop_zoom_proxy()
+        stop_mjpeg_streamer()
+        if not start_mjpeg_streamer(capture_w, capture_h, MJPEG_CAPTURE_PORT):
+            return fall_back_from_zoom(quality, f"capture at {capture_w}x{capture_h} did not start")
+        try:
+            zoom_proxy = ZoomProxy((capture_w, capture_h), box, scale, out_size)
+        except OSError as e:
+            return fall_back_from_zoom(quality, f"could not serve port {MJPEG_PORT}: {e}")
+        zoom_proxy.start()
+    zoom_region = aligned
+    return out_size
+
+def zoom_message():
+    if zoom_region is None:
+        return "ZOOM:OFF\n"
+    return "ZOOM:{}:{}:{}:{}\n".format(*zoom_region)
+
 # -------------------- HELPER --------------------
 def send_uart(data: str):
     """Send the string over UART using pigpio's wave_add_serial."""
@@ -214,19 +483,23 @@ def handle_client(conn, addr):
     """Handle a single client connection"""
     global target_w, target_h, stream_w, stream_h, current_quality
     
-    print(f"[INFO] Client connected: {addr}")
+    log.info("Client connected: %s", addr)
     
     try:
-        # Send initial resolution to client
+        conn.settimeout(CLIENT_TIMEOUT)
+        
+        # Send initial state to client so it can resync after a reconnect
+        conn.send(f"QUALITY:{current_quality}\n".encode())
         conn.send(f"RESOLUTION:{target_w}:{target_h}\n".encode())
+        conn.send(zoom_message().encode())
         conn.send(f"STREAM_RESOLUTION:{stream_w}:{stream_h}\n".encode())
-        print(f"[INFO] Sent target: {target_w}x{target_h}, stream: {stream_w}x{stream_h}")
+        log.info("Sent target: %sx%s, stream: %sx%s", target_w, target_h, stream_w, stream_h)
         
         buffer = ""
         while True:
             data = conn.recv(1024)
             if not data:
-                print(f"[INFO] Client {addr} disconnected")
+                log.info("Client %s disconnected", addr)
                 break
             
             buffer += data.decode()
@@ -237,7 +510,13 @@ def handle_client(conn, addr):
                 if not text:
                     continue
                 
-                print(f"[RECV] {text}")
+                # Heartbeat from client
+                if text == "PING":
+                    conn.send(b"PONG\n")
+                    continue
+                
+                eventlog.record_event("recv", text)
+                recv_log.debug("RECV %s", text)
                 
                 # Handle resolution change command
                 if text.startswith("SET_RESOLUTION:"):
@@ -245,11 +524,12 @@ def handle_client(conn, addr):
                     if len(parts) >= 3:
                         new_width = int(parts[1])
                         new_height = int(parts[2])
-                        print(f"[INFO] Client requested resolution change to {new_width}x{new_height}")
+                        log.info("Client requested resolution change to %sx%s", new_width, new_height)
                         target_w, target_h, stream_w, stream_h = apply_resolution(new_width, new_height, current_quality)
                         conn.send(f"RESOLUTION:{target_w}:{target_h}\n".encode())
+                        conn.send(zoom_message().encode())
                         conn.send(f"STREAM_RESOLUTION:{stream_w}:{stream_h}\n".encode())
-                        print("[INFO] Resolution change complete")
+                        log.info("Resolution change complete")
                 
                 # Handle quality change command
                 elif text.startswith("SET_QUALITY:"):
@@ -257,24 +537,49 @@ def handle_client(conn, addr):
                     if len(parts) >= 2:
                         new_quality = parts[1]
                         if new_quality in QUALITY_PRESETS:
-                            print(f"[INFO] Client requested quality change to {new_quality}")
-                            target_w, target_h, stream_w, stream_h = apply_resolution(target_w, target_h, new_quality)
+                            log.info("Client requested quality change to %s", new_quality)
+                            zoomed_size = apply_zoom(zoom_region, new_quality) if zoom_region else None
+                            if zoomed_size:
+                                stream_w, stream_h = zoomed_size
+                            elif zoom_region or current_quality != new_quality:
+                                # A failed zoom has already fallen back to the new quality
+                                target_w, target_h, stream_w, stream_h = apply_resolution(target_w, target_h, new_quality)
+                            conn.send(zoom_message().encode())
                             conn.send(f"STREAM_RESOLUTION:{stream_w}:{stream_h}\n".encode())
-                            print("[INFO] Quality change complete")
+                            log.info("Quality change complete")
+                
+                # Handle region-of-interest zoom command
+                elif text.startswith("SET_ZOOM:"):
+                    parts = text.split(':')
+                    zoomed_size = None
+                    if len(parts) >= 5:
+                        region = tuple(int(p) for p in parts[1:5])
+                        log.info("Client requested zoom to %sx%s+%s+%s", region[2], region[3], region[0], region[1])
+                        zoomed_size = apply_zoom(region, current_quality)
+                    if zoomed_size:
+                        stream_w, stream_h = zoomed_size
+                    elif zoom_region and parts[1] == "OFF":
+                        target_w, target_h, stream_w, stream_h = apply_resolution(target_w, target_h, current_quality)
+                    conn.send(zoom_message().encode())
+                    conn.send(f"STREAM_RESOLUTION:{stream_w}:{stream_h}\n".encode())
+                    log.info("Zoom change complete")
                 
                 else:
                     # Forward to UART
                     send_uart(text + "\n")
     
+    except socket.timeout:
+        log.warning("Client %s timed out (no heartbeat)", addr)
+    
     except Exception as e:
-        print(f"[ERROR] Client handler error: {e}")
+        log.error("Client handler error: %s", e)
     
     finally:
         conn.close()
-        print(f"[INFO] Connection closed for {addr}")
+        log.info("Connection closed for %s", addr)
 
 # -------------------- STARTUP --------------------
-print("[INFO] Starting up...")
+log.info("Starting up...")
 
 # Start with default quality
 stream_w, stream_h = choose_stream_resolution(target_w, target_h, current_quality)
@@ -285,8 +590,8 @@ sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 sock.bind((HOST, PORT))
 sock.listen(1)
-print(f"[INFO] Event server running on port {PORT}...")
-print(f"[INFO] Waiting for client connections...")
+log.info("Event server running on port %s...", PORT)
+log.info("Waiting for client connections...")
 
 try:
     while True:
@@ -297,14 +602,16 @@ try:
         handle_client(conn, addr)
         
         # After client disconnects, loop continues and waits for next client
-        print("[INFO] Ready for new connection...")
+        log.info("Ready for new connection...")
 
 except KeyboardInterrupt:
-    print("\n[INFO] Keyboard interrupt received, shutting down...")
+    log.info("Keyboard interrupt received, shutting down...")
 
 finally:
-    print("[INFO] Cleaning up...")
+    log.info("Cleaning up...")
+    stop_zoom_proxy()
     stop_mjpeg_streamer()
     sock.close()
     pi.stop()
-    print("[INFO] Server stopped.")
\ No newline at end of file
+    log.info("Server stopped.")
+    eventlog.shutdown()
\ No newline at end of file